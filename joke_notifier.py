@@ -1,82 +1,218 @@
 import sys
 import os
+import copy
 import json
+import re
 import time
+import functools
+import itertools
 import threading
+import concurrent.futures
 import requests
+from collections import deque
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from datetime import datetime
 
+if sys.platform == 'win32':
+    import winreg
+
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QLabel, QPushButton, QFrame, QListWidget, QScrollArea, 
     QDialog, QRadioButton, QCheckBox, QSlider, QGroupBox, 
-    QMessageBox, QGridLayout, QTextEdit, QSplitter, QSystemTrayIcon, QMenu
+    QMessageBox, QGridLayout, QTextEdit, QSplitter, QSystemTrayIcon, QMenu,
+    QButtonGroup
 )
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject, QSize
 from PyQt6.QtGui import QIcon, QColor, QPainter, QPixmap, QFont, QPalette
 
-# Import notification libraries based on what's available
+# Settings live next to this script; the path never changes while running
+_SETTINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "joke_notifier_settings.json")
+
+# JokeAPI request limits: (connect, read) timeouts in seconds, connection
+# retries, and an overall deadline that covers every connect attempt plus one read
+_REQUEST_TIMEOUT = (3.05, 10)
+_REQUEST_RETRIES = Retry(total=2, read=0)
+_RESPONSE_DEADLINE = 20
+
+# Use orjson for settings and API payloads when it is installed
 try:
+    import orjson
+    
+    _loads = orjson.loads
+    
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _loads = json.loads
+    
+    def _dumps(obj):
+        return json.dumps(obj, indent=4).encode()
+
+# Notification backends are only imported when the first notification is
+# shown, so the app does not pay for libraries it never uses
+NOTIFICATION_SYSTEM = None
+_NOTIFIER_CACHE = {}
+_NOTIFIER_LOCK = threading.Lock()
+
+
+def _make_win10toast_click():
     # For Windows 10+, use win10toast_click which has better Windows support
     import win10toast_click
     toaster = win10toast_click.ToastNotifier()
-    NOTIFICATION_SYSTEM = "win10toast_click"
-except ImportError:
-    try:
-        # Fall back to standard win10toast
-        import win10toast
-        toaster = win10toast.ToastNotifier()
-        NOTIFICATION_SYSTEM = "win10toast"
-    except ImportError:
-        try:
-            # Try plyer as the next option
-            from plyer import notification
-            NOTIFICATION_SYSTEM = "plyer"
-        except ImportError:
-            try:
-                # Linux-specific option
-                import notify2
-                notify2.init("Joke Notifier")
-                NOTIFICATION_SYSTEM = "notify2"
-            except ImportError:
-                # Final fallback to Qt's own system
-                NOTIFICATION_SYSTEM = "qt"
+    return lambda title, message, duration: toaster.show_toast(
+        title,
+        message,
+        icon_path=None,  # You can specify an icon path here
+        duration=duration,
+        threaded=True
+    )
+
+
+def _make_win10toast():
+    # Fall back to standard win10toast
+    import win10toast
+    toaster = win10toast.ToastNotifier()
+    return lambda title, message, duration: toaster.show_toast(
+        title,
+        message,
+        duration=duration,
+        threaded=True
+    )
+
+
+def _make_plyer():
+    # Try plyer as the next option
+    from plyer import notification
+    return lambda title, message, duration: notification.notify(
+        title=title,
+        message=message,
+        app_name="Joke Notifier",
+        timeout=duration,
+        app_icon=None  # You can specify an icon path here
+    )
+
+
+def _make_notify2():
+    # Linux-specific option
+    import notify2
+    notify2.init("Joke Notifier")
+    
+    def notify(title, message, duration):
+        n = notify2.Notification(title, message)
+        n.timeout = duration * 1000  # Convert to milliseconds
+        n.show()
+    
+    return notify
+
+
+_NOTIFIER_BACKENDS = (
+    ("win10toast_click", _make_win10toast_click),
+    ("win10toast", _make_win10toast),
+    ("plyer", _make_plyer),
+    ("notify2", _make_notify2),
+)
+
+
+def _get_notifier():
+    """Return the notify callable for the first usable backend, or None for Qt."""
+    global NOTIFICATION_SYSTEM
+    with _NOTIFIER_LOCK:
+        if NOTIFICATION_SYSTEM is None:
+            # Final fallback to Qt's own system
+            NOTIFICATION_SYSTEM = "qt"
+            for name, make_notifier in _NOTIFIER_BACKENDS:
+                try:
+                    _NOTIFIER_CACHE[name] = make_notifier()
+                except Exception:
+                    continue
+                NOTIFICATION_SYSTEM = name
+                break
+        return _NOTIFIER_CACHE.get(NOTIFICATION_SYSTEM)
+
+
+# Default settings
+_DEFAULT_SETTINGS = {
+    "frequency": 30,  # minutes
+    "categories": ["Any"],
+    "safe_mode": True,
+    "joke_type": "Any",
+    "language": "en",
+    "autostart": False,
+    "notification_duration": 10,
+    "max_history": 15
+}
+
+# Settings that require restarting the notification loop when changed
+_SETTINGS_KEYS_AFFECTING_LOOP = ("frequency", "categories", "safe_mode", "joke_type", "language", "autostart")
 
 
 # Signal class to safely update UI from threads
 class SignalBridge(QObject):
     update_status = pyqtSignal(str)
-    update_next_joke_time = pyqtSignal(str)
     add_joke = pyqtSignal(dict)
+    show_qt_notification = pyqtSignal(str, str, int)
 
 
 class JokeNotifier(QMainWindow):
     def __init__(self):
         super().__init__()
         
+        # Tray widgets are created in setup_system_tray
+        self.tray_icon = None
+        self.tray_toggle_action = None
+        
         # Variables
         self.is_running = False
-        self.joke_thread = None
-        self.last_jokes = []
+        # Prefetched request and the URL it was made for; shared by the
+        # worker and GUI threads, so only touched under _prefetch_lock
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_future = None
+        self._prefetch_url = None
+        self._next_joke_time = None
         self.max_stored_jokes = 15
+        self.last_jokes = deque(maxlen=self.max_stored_jokes)
+        self._indicator_cache = {}  # color -> rendered status pixmap
         
         # Default settings
-        self.settings = {
-            "frequency": 30,  # minutes
-            "categories": ["Any"],
-            "safe_mode": True,
-            "joke_type": "Any",
-            "language": "en",
-            "autostart": False,
-            "notification_duration": 10,
-            "max_history": 15
-        }
+        self.settings = copy.deepcopy(_DEFAULT_SETTINGS)
+        
+        # Shared HTTP session so repeated fetches reuse the same connection
+        self._http = requests.Session()
+        self._http.headers.update({"User-Agent": "JokeNotifier/1.0"})
+        self._http.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=_REQUEST_RETRIES))
+        
+        # Network calls run here so a stalled request never wedges the joke thread
+        self._net_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="joke-net")
+        
+        # Settings are written on a background thread, debounced so quick
+        # successive changes end up as a single write
+        self._io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="joke-io")
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(500)
+        self._save_timer.timeout.connect(self._flush_settings)
         
         # Create signal bridge
         self.signal_bridge = SignalBridge()
         self.signal_bridge.update_status.connect(self.update_status)
-        self.signal_bridge.update_next_joke_time.connect(self.update_next_joke_time)
         self.signal_bridge.add_joke.connect(self.add_joke_to_list)
+        self.signal_bridge.show_qt_notification.connect(self.show_qt_notification)
+        
+        # Countdown display runs on the GUI thread; the worker only sets _next_joke_time
+        self._countdown_timer = QTimer(self)
+        self._countdown_timer.setInterval(1000)
+        self._countdown_timer.timeout.connect(self._tick_countdown)
+        
+        # One long-lived joke thread. Every start/stop bumps _run_generation
+        # under _run_cond; the worker compares it after each fetch or wait, so
+        # a restart always begins a fresh loop. _shutdown lets it exit on close
+        self._run_cond = threading.Condition()
+        self._run_generation = 0
+        self._shutdown = False
+        self._worker = threading.Thread(target=self._worker_main, daemon=True)
+        self._worker.start()
         
         # Setup UI
         self.setWindowTitle("Joke Notifier")
@@ -260,16 +396,20 @@ class JokeNotifier(QMainWindow):
                 self.show_and_activate()
     
     def update_status_indicator(self, color):
-        # Create a colored circle using a pixmap
-        pixmap = QPixmap(20, 20)
-        pixmap.fill(Qt.GlobalColor.transparent)
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.setBrush(QColor(color))
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.drawEllipse(2, 2, 16, 16)
-        painter.end()
+        pixmap = self._indicator_cache.get(color)
+        if pixmap is None:
+            # Create a colored circle using a pixmap
+            pixmap = QPixmap(20, 20)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setBrush(QColor(color))
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.drawEllipse(2, 2, 16, 16)
+            painter.end()
+            
+            self._indicator_cache[color] = pixmap
         
         self.status_indicator.setPixmap(pixmap)
     
@@ -290,16 +430,21 @@ class JokeNotifier(QMainWindow):
         self.update_status_indicator("green")
         
         # Update tray menu if it exists
-        if hasattr(self, 'tray_toggle_action'):
+        if self.tray_toggle_action is not None:
             self.tray_toggle_action.setText("Stop Notifications")
         
-        # Start the joke thread
-        self.joke_thread = threading.Thread(target=self.joke_notification_loop, daemon=True)
-        self.joke_thread.start()
+        # Start a new run on the joke thread
+        self._next_joke_time = None
+        self._signal_worker()
+        if self.isVisible():
+            self._countdown_timer.start()
     
     def stop_notifications(self):
         # Original stop_notifications code
         self.is_running = False
+        self._signal_worker()
+        self._countdown_timer.stop()
+        self._discard_prefetched_joke()
         self.status_label.setText("Stopped")
         self.toggle_button.setText("Start Notifications")
         self.toggle_button.setStyleSheet("background-color: #ccffcc;")
@@ -309,171 +454,251 @@ class JokeNotifier(QMainWindow):
         self.update_status_indicator("red")
         
         # Update tray menu if it exists
-        if hasattr(self, 'tray_toggle_action'):
+        if self.tray_toggle_action is not None:
             self.tray_toggle_action.setText("Start Notifications")
     
-    def joke_notification_loop(self):
+    def _signal_worker(self):
+        # End the current run (if any) and wake the joke thread
+        with self._run_cond:
+            self._run_generation += 1
+            self._run_cond.notify_all()
+    
+    def _wait_for_run_change(self, generation, timeout=None):
+        """Block up to timeout seconds; return True once the run was stopped, restarted or shut down."""
+        with self._run_cond:
+            return self._run_cond.wait_for(
+                lambda: self._run_generation != generation or self._shutdown, timeout
+            )
+    
+    def _worker_main(self):
+        # Sleep until notifications are started, run them until stopped, repeat
+        while True:
+            with self._run_cond:
+                self._run_cond.wait_for(lambda: self.is_running or self._shutdown)
+                if self._shutdown:
+                    return
+                generation = self._run_generation
+            
+            try:
+                self.joke_notification_loop(generation)
+            except Exception as e:
+                self.signal_bridge.update_status.emit(f"Error: {str(e)}")
+                # Don't spin on a broken run; wait for the next start or stop
+                self._wait_for_run_change(generation)
+    
+    def joke_notification_loop(self, generation):
         # Send first joke immediately
-        self.fetch_and_show_joke()
+        self.fetch_and_show_joke(generation)
         
-        # Then loop based on frequency
-        while self.is_running:
-            # Calculate next joke time
-            next_joke_time = time.time() + (self.settings["frequency"] * 60)
+        # Then block until the next joke is due or the run is stopped or restarted
+        while self._run_generation == generation:
+            # Request the next joke now so its latency hides inside the wait
+            self._start_prefetch(generation)
             
-            # Loop for updating the countdown
-            while time.time() < next_joke_time and self.is_running:
-                if not self.is_running:
-                    return
-                
-                # Update countdown
-                remaining = int(next_joke_time - time.time())
-                mins = remaining // 60
-                secs = remaining % 60
-                self.signal_bridge.update_next_joke_time.emit(f"Next joke in: {mins}m {secs}s")
-                
-                # Sleep briefly
-                time.sleep(1)
+            interval = self.settings["frequency"] * 60
+            self._next_joke_time = time.monotonic() + interval
             
-            # Fetch and show joke if still running
-            if self.is_running:
-                self.fetch_and_show_joke()
+            if self._wait_for_run_change(generation, interval):
+                return
+            
+            self.fetch_and_show_joke(generation)
+    
+    def _tick_countdown(self):
+        if self._next_joke_time is None:
+            return
+        
+        remaining = max(0, int(self._next_joke_time - time.monotonic()))
+        mins, secs = divmod(remaining, 60)
+        self.next_joke_label.setText(f"Next joke in: {mins}m {secs}s")
+    
+    def _rebuild_joke_url(self):
+        # Build the request URL once per settings change instead of per fetch
+        base_url = "https://v2.jokeapi.dev/joke/"
+        categories = ",".join(self.settings["categories"])
+        
+        url = f"{base_url}{categories}?blacklistFlags=religious,racist,sexist,explicit"
+        
+        # Add parameters based on settings
+        if self.settings["safe_mode"]:
+            url += "&safe-mode"
+        
+        if self.settings["joke_type"] != "Any":
+            url += f"&type={self.settings['joke_type'].lower()}"
+        
+        if self.settings["language"] != "en":
+            url += f"&lang={self.settings['language']}"
+        
+        self._joke_url = url
+    
+    def _submit_joke_request(self):
+        return self._net_pool.submit(self._http.get, self._joke_url, timeout=_REQUEST_TIMEOUT)
+    
+    def _start_prefetch(self, generation):
+        url = self._joke_url
+        future = self._submit_joke_request()
+        with self._prefetch_lock:
+            # A stop that landed after the submit must not leak into the next run
+            if self._run_generation != generation:
+                future.cancel()
+                return
+            self._prefetch_future, self._prefetch_url = future, url
+    
+    def _take_prefetched_joke(self):
+        # Hand out the prefetched request, still running or finished cleanly,
+        # as long as it was made for the current URL
+        with self._prefetch_lock:
+            future, self._prefetch_future = self._prefetch_future, None
+            url, self._prefetch_url = self._prefetch_url, None
+        if future is None:
+            return None
+        if url == self._joke_url and not future.cancelled():
+            if not future.done() or future.exception() is None:
+                return future
+        future.cancel()
+        return None
     
-    def update_next_joke_time(self, message):
-        self.next_joke_label.setText(message)
+    def _discard_prefetched_joke(self):
+        with self._prefetch_lock:
+            future, self._prefetch_future = self._prefetch_future, None
+            self._prefetch_url = None
+        if future is not None:
+            future.cancel()
+    
+    def _wait_for_response(self, future, generation):
+        """Wait for a request in short slices; return None if the run ends first."""
+        deadline = time.monotonic() + _RESPONSE_DEADLINE
+        while True:
+            try:
+                return future.result(timeout=0.25)
+            except concurrent.futures.TimeoutError:
+                if self._run_generation != generation:
+                    return None
+                if time.monotonic() >= deadline:
+                    raise
     
-    def fetch_and_show_joke(self):
+    def _fetch_joke_response(self, generation):
+        # Use the prefetched joke if available, otherwise request one now
+        future = self._take_prefetched_joke() or self._submit_joke_request()
         try:
-            # Build URL
-            base_url = "https://v2.jokeapi.dev/joke/"
-            categories = ",".join(self.settings["categories"])
+            response = self._wait_for_response(future, generation)
+            if response is None:
+                # Stopped or restarted while waiting; nothing to report
+                return None
             
-            url = f"{base_url}{categories}?blacklistFlags=religious,racist,sexist,explicit"
-            
-            # Add parameters based on settings
-            if self.settings["safe_mode"]:
-                url += "&safe-mode"
-            
-            if self.settings["joke_type"] != "Any":
-                url += f"&type={self.settings['joke_type'].lower()}"
-            
-            if self.settings["language"] != "en":
-                url += f"&lang={self.settings['language']}"
-            
-            # Make the request
-            response = requests.get(url)
-            joke_data = response.json()
-            
-            # Check if there's an error
-            if joke_data.get("error", False):
-                error_message = joke_data.get("message", "Unknown error")
-                self.signal_bridge.update_status.emit(f"Error: {error_message}")
-                return
+            # Release the connection back to the pool as soon as the body is read
+            with response:
+                # JokeAPI reports its own errors as JSON, so only bail out on
+                # HTTP status for non-JSON bodies such as proxy error pages
+                if "json" not in response.headers.get("Content-Type", ""):
+                    response.raise_for_status()
+                    self.signal_bridge.update_status.emit("Error: Unexpected response from JokeAPI")
+                    return None
+                joke_data = _loads(response.content)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.signal_bridge.update_status.emit("Error: JokeAPI did not respond in time")
+            return None
+        except requests.exceptions.RequestException as e:
+            self.signal_bridge.update_status.emit(f"Error: Could not fetch joke ({e})")
+            return None
+        
+        # Check if there's an error
+        if joke_data.get("error", False):
+            error_message = joke_data.get("message", "Unknown error")
+            self.signal_bridge.update_status.emit(f"Error: {error_message}")
+            return None
+        
+        return joke_data
+    
+    def _render_joke(self, joke_data):
+        # Format joke based on type
+        if joke_data["type"] == "single":
+            joke_text = joke_data["joke"]
+            notification_title = "Joke Time!"
+        else:  # twopart
+            joke_text = f"{joke_data['setup']}\n\n{joke_data['delivery']}"
+            notification_title = joke_data['setup']
             
-            # Format joke based on type
-            if joke_data["type"] == "single":
-                joke_text = joke_data["joke"]
+            # If setup is too long for notification title, use generic title
+            if len(notification_title) > 50:
                 notification_title = "Joke Time!"
-            else:  # twopart
-                joke_text = f"{joke_data['setup']}\n\n{joke_data['delivery']}"
-                notification_title = joke_data['setup']
-                
-                # If setup is too long for notification title, use generic title
-                if len(notification_title) > 50:
-                    notification_title = "Joke Time!"
-            
-            # Add category info
-            category = joke_data.get("category", "")
-            timestamp = datetime.now().strftime("%I:%M %p")
-            
-            # Add joke to list with metadata
-            joke_with_meta = {
-                "text": joke_text,
-                "category": category,
-                "time": timestamp,
-                "id": joke_data.get("id", "")
-            }
-            
-            self.signal_bridge.add_joke.emit(joke_with_meta)
-            
-            # Show notification
-            notification_message = joke_text
-            if joke_data["type"] == "twopart":
-                notification_message = joke_data['delivery']
-                
-            self.show_notification(notification_title, notification_message)
+        
+        # Add category info
+        category = joke_data.get("category", "")
+        timestamp = datetime.now().strftime("%I:%M %p")
+        
+        # Add joke to list with metadata
+        joke_with_meta = {
+            "text": joke_text,
+            "category": category,
+            "time": timestamp,
+            "id": joke_data.get("id", "")
+        }
+        
+        self.signal_bridge.add_joke.emit(joke_with_meta)
+        
+        # Show notification
+        notification_message = joke_text
+        if joke_data["type"] == "twopart":
+            notification_message = joke_data['delivery']
             
-            # Update status
-            self.signal_bridge.update_status.emit(f"Last joke sent successfully at {timestamp}")
+        self.show_notification(notification_title, notification_message)
+        
+        # Update status
+        self.signal_bridge.update_status.emit(f"Last joke sent successfully at {timestamp}")
+    
+    def fetch_and_show_joke(self, generation):
+        try:
+            joke_data = self._fetch_joke_response(generation)
             
+            # Drop the joke if the run was stopped or restarted during the fetch
+            if joke_data is not None and self._run_generation == generation:
+                self._render_joke(joke_data)
         except Exception as e:
             self.signal_bridge.update_status.emit(f"Error: {str(e)}")
     
     def show_notification(self, title, message):
+        # Get notification duration from settings
+        duration = self.settings.get("notification_duration", 10)
+        
         try:
-            # Get notification duration from settings
-            duration = self.settings.get("notification_duration", 10)
-            
             # Use the appropriate notification system
-            if NOTIFICATION_SYSTEM == "win10toast_click":
-                # This has better Windows support
-                toaster.show_toast(
-                    title,
-                    message,
-                    icon_path=None,  # You can specify an icon path here
-                    duration=duration,
-                    threaded=True
-                )
-                return True
-            elif NOTIFICATION_SYSTEM == "win10toast":
-                toaster.show_toast(
-                    title,
-                    message,
-                    duration=duration,
-                    threaded=True
-                )
-                return True
-            elif NOTIFICATION_SYSTEM == "plyer":
-                notification.notify(
-                    title=title,
-                    message=message,
-                    app_name="Joke Notifier",
-                    timeout=duration,
-                    app_icon=None  # You can specify an icon path here
-                )
+            notify = _get_notifier()
+            if notify is not None:
+                notify(title, message, duration)
                 return True
-            elif NOTIFICATION_SYSTEM == "notify2":
-                n = notify2.Notification(title, message)
-                n.timeout = duration * 1000  # Convert to milliseconds
-                n.show()
-                return True
-            elif NOTIFICATION_SYSTEM == "qt":
-                # Use Qt's own notification system via QSystemTrayIcon
-                if hasattr(self, 'tray_icon'):
-                    # Show the notification using Qt's system
-                    self.tray_icon.showMessage(
-                        title,
-                        message,
-                        QSystemTrayIcon.MessageIcon.Information,
-                        duration * 1000  # milliseconds
-                    )
-                    return True
-                
-            # Last resort fallback to a simple messagebox if no notification system is available
-            QTimer.singleShot(0, lambda: QMessageBox.information(self, title, message))
+            
+            # Use Qt's own notification system (on the GUI thread)
+            self.signal_bridge.show_qt_notification.emit(title, message, duration)
             return True
                 
         except Exception as e:
             self.signal_bridge.update_status.emit(f"Notification error: {str(e)}")
             
-            # If all else fails, use Qt's message box as a last resort
+            # If all else fails, fall back to Qt's own notification
             try:
-                QTimer.singleShot(0, lambda: QMessageBox.information(self, title, message))
+                self.signal_bridge.show_qt_notification.emit(title, message, duration)
             except:
                 pass
                 
             return False
     
+    def show_qt_notification(self, title, message, duration):
+        # Prefer the non-blocking tray balloon when the desktop can show it
+        if (self.tray_icon is not None
+                and QSystemTrayIcon.isSystemTrayAvailable()
+                and QSystemTrayIcon.supportsMessages()):
+            self.tray_icon.showMessage(
+                title,
+                message,
+                QSystemTrayIcon.MessageIcon.Information,
+                duration * 1000  # milliseconds
+            )
+            return
+        
+        # Last resort: a modal message box, only when there is no usable tray
+        QTimer.singleShot(0, lambda: QMessageBox.information(self, title, message))
+    
     def send_test_notification(self):
         self.show_notification(
             "Test Notification", 
@@ -482,15 +707,19 @@ class JokeNotifier(QMainWindow):
         self.status_label.setText("Test notification sent")
     
     def add_joke_to_list(self, joke_data):
-        # Add to the start of the list
-        self.last_jokes.insert(0, joke_data)
-        
-        # Keep only the last max_stored_jokes
-        if len(self.last_jokes) > self.max_stored_jokes:
-            self.last_jokes = self.last_jokes[:self.max_stored_jokes]
-        
-        # Update the listbox
-        self.update_jokes_listbox()
+        # Format the joke to fit in the listbox once, when it arrives
+        joke_text = joke_data["text"].replace('\n\n', ' - ')
+        if len(joke_text) > 60:
+            joke_text = joke_text[:57] + "..."
+        joke_data["_display"] = f"[{joke_data['time']}] {joke_text}"
+        
+        # Add to the start of the list; the deque drops the oldest joke itself
+        self.last_jokes.appendleft(joke_data)
+        
+        # Update the listbox in place instead of rebuilding it
+        self.jokes_listbox.insertItem(0, joke_data["_display"])
+        while self.jokes_listbox.count() > self.max_stored_jokes:
+            self.jokes_listbox.takeItem(self.jokes_listbox.count() - 1)
     
     def update_jokes_listbox(self):
         # Clear the listbox
@@ -498,13 +727,7 @@ class JokeNotifier(QMainWindow):
         
         # Add jokes to the listbox
         for joke in self.last_jokes:
-            # Format the joke to fit in the listbox
-            joke_text = joke["text"].replace('\n\n', ' - ')
-            if len(joke_text) > 60:
-                joke_text = joke_text[:57] + "..."
-            
-            display_text = f"[{joke['time']}] {joke_text}"
-            self.jokes_listbox.addItem(display_text)
+            self.jokes_listbox.addItem(joke["_display"])
     
     def show_full_joke(self, item):
         # Get selected index
@@ -566,20 +789,26 @@ class JokeNotifier(QMainWindow):
                 
                 # Check if settings have changed
                 was_running = self.is_running
-                settings_changed = (
-                    self.settings.get("frequency") != new_settings.get("frequency") or
-                    self.settings.get("categories") != new_settings.get("categories") or
-                    self.settings.get("safe_mode") != new_settings.get("safe_mode") or
-                    self.settings.get("joke_type") != new_settings.get("joke_type") or
-                    self.settings.get("language") != new_settings.get("language") or
-                    self.settings.get("autostart", False) != new_settings.get("autostart")
+                settings_changed = any(
+                    self.settings.get(key) != new_settings.get(key)
+                    for key in _SETTINGS_KEYS_AFFECTING_LOOP
                 )
                 
                 # Update settings
                 self.settings = new_settings
+                old_url = self._joke_url
+                self._rebuild_joke_url()
+                if self._joke_url != old_url:
+                    self._discard_prefetched_joke()
                 
                 # Update max stored jokes
                 self.max_stored_jokes = self.settings.get("max_history", 15)
+                if self.last_jokes.maxlen != self.max_stored_jokes:
+                    # Newest jokes are at the front, so keep the first max_stored_jokes
+                    self.last_jokes = deque(
+                        itertools.islice(self.last_jokes, self.max_stored_jokes), maxlen=self.max_stored_jokes
+                    )
+                    self.update_jokes_listbox()
                 
                 # Apply any changes that need immediate action
                 if was_running and settings_changed:
@@ -594,31 +823,66 @@ class JokeNotifier(QMainWindow):
                 self.status_label.setText("Settings saved successfully")
     
     def save_settings_to_file(self):
-        # Save settings to a JSON file
+        # Schedule a save; restarting the timer coalesces rapid changes
+        self._save_timer.start()
+    
+    def _flush_settings(self):
+        # Serialize on the GUI thread, then hand the disk write to the I/O thread
+        self._save_timer.stop()
         try:
-            settings_dir = os.path.dirname(os.path.abspath(__file__))
-            settings_path = os.path.join(settings_dir, "joke_notifier_settings.json")
-            
-            with open(settings_path, "w") as f:
-                json.dump(self.settings, f, indent=4)
+            payload = _dumps(self.settings)
         except Exception as e:
             self.status_label.setText(f"Error saving settings: {str(e)}")
+            return
+        
+        self._io_pool.submit(self._write_settings_file, payload)
+    
+    def _write_settings_file(self, payload):
+        # Save settings to a JSON file, replacing it atomically
+        try:
+            settings_path = _SETTINGS_PATH
+            tmp_path = settings_path + ".tmp"
+            
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, settings_path)
+        except Exception as e:
+            self.signal_bridge.update_status.emit(f"Error saving settings: {str(e)}")
     
     def load_settings(self):
         # Load settings from a JSON file
         try:
-            settings_dir = os.path.dirname(os.path.abspath(__file__))
-            settings_path = os.path.join(settings_dir, "joke_notifier_settings.json")
+            settings_path = _SETTINGS_PATH
             
             if os.path.exists(settings_path):
-                with open(settings_path, "r") as f:
-                    loaded_settings = json.load(f)
+                with open(settings_path, "rb") as f:
+                    loaded_settings = _loads(f.read())
                     self.settings.update(loaded_settings)
         except Exception as e:
             self.status_label.setText(f"Error loading settings: {str(e)}")
+        
+        try:
+            self._rebuild_joke_url()
+        except Exception as e:
+            # The file held values we can't build a request from; use the defaults
+            self.status_label.setText(f"Error loading settings, using defaults: {str(e)}")
+            self.settings = copy.deepcopy(_DEFAULT_SETTINGS)
+            self._rebuild_joke_url()
+    
+    def showEvent(self, event):
+        # Resume the countdown display when the window comes back from the tray
+        if self.is_running:
+            self._tick_countdown()
+            self._countdown_timer.start()
+        super().showEvent(event)
+    
+    def hideEvent(self, event):
+        # Nothing to refresh while the window is hidden
+        self._countdown_timer.stop()
+        super().hideEvent(event)
     
     def closeEvent(self, event):
-        if hasattr(self, 'tray_icon') and self.tray_icon.isVisible():
+        if self.tray_icon is not None and self.tray_icon.isVisible():
             # Show a balloon message when minimizing to tray for the first time
             QTimer.singleShot(500, lambda: self.tray_icon.showMessage(
                 "Joke Notifier",
@@ -635,14 +899,35 @@ class JokeNotifier(QMainWindow):
             if self.is_running:
                 self.stop_notifications()
             
-            # Save settings
-            self.save_settings_to_file()
+            # Let the joke thread exit
+            self._shutdown = True
+            self._signal_worker()
+            
+            # Save settings and wait for the write to land
+            self._flush_settings()
+            self._io_pool.shutdown(wait=True)
+            
+            # Release pooled connections and network workers
+            self._net_pool.shutdown(wait=False, cancel_futures=True)
+            self._http.close()
             
             # Accept the close event
             event.accept()
 
 
 class SettingsDialog(QDialog):
+    # Available categories
+    _CATEGORIES = ("Misc", "Programming", "Dark", "Pun", "Spooky", "Christmas")
+    
+    # Available languages
+    _LANGUAGES = (
+        ("English", "en"),
+        ("German", "de"),
+        ("Spanish", "es"),
+        ("French", "fr"),
+        ("Italian", "it")
+    )
+    
     def __init__(self, current_settings, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Joke Notifier Settings")
@@ -685,11 +970,14 @@ class SettingsDialog(QDialog):
         
         # Frequency slider
         self.frequency_slider = QSlider(Qt.Orientation.Horizontal)
+        self.frequency_slider.setObjectName("freqSlider")
         self.frequency_slider.setMinimum(1)
         self.frequency_slider.setMaximum(120)
         self.frequency_slider.setValue(current_settings["frequency"])
         self.frequency_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
         self.frequency_slider.setTickInterval(10)
+        # With tracking off, valueChanged (and the label update) fires once on release
+        self.frequency_slider.setTracking(False)
         self.frequency_slider.valueChanged.connect(self.update_frequency_display)
         frequency_layout.addWidget(self.frequency_slider)
         
@@ -722,24 +1010,19 @@ class SettingsDialog(QDialog):
         # Connect signals to enable/disable checkboxes
         self.category_mode_any.toggled.connect(self.update_category_mode)
         
-        # Categories frame
-        categories_frame = QFrame()
-        categories_frame.setContentsMargins(20, 0, 0, 0)
-        category_layout.addWidget(categories_frame)
+        # Categories frame (enabling/disabling it applies to every checkbox inside)
+        self._cat_container = QFrame()
+        self._cat_container.setContentsMargins(20, 0, 0, 0)
+        category_layout.addWidget(self._cat_container)
         
         # Grid layout for checkboxes
-        categories_grid = QGridLayout(categories_frame)
+        categories_grid = QGridLayout(self._cat_container)
         categories_grid.setContentsMargins(0, 0, 0, 0)
         
-        # Available categories
-        available_categories = [
-            "Misc", "Programming", "Dark", "Pun", "Spooky", "Christmas"
-        ]
-        
         # Create checkboxes
         self.category_checkboxes = {}
         row, col = 0, 0
-        for i, cat in enumerate(available_categories):
+        for i, cat in enumerate(self._CATEGORIES):
             checkbox = QCheckBox(cat)
             checkbox.setChecked(cat in current_settings["categories"] and "Any" not in current_settings["categories"])
             self.category_checkboxes[cat] = checkbox
@@ -747,10 +1030,13 @@ class SettingsDialog(QDialog):
             # Arrange in 2 columns
             categories_grid.addWidget(checkbox, row, col)
             row += 1
-            if row > len(available_categories) // 2:
+            if row > len(self._CATEGORIES) // 2:
                 row = 0
                 col += 1
         
+        # Fixed (name, checkbox) pairs for reading the selection on save
+        self._cat_items = tuple(self.category_checkboxes.items())
+        
         # Initial checkbox state
         self.update_category_mode()
         
@@ -786,27 +1072,30 @@ class SettingsDialog(QDialog):
         self.joke_type_twopart.setChecked(current_settings["joke_type"] == "twopart")
         type_layout.addWidget(self.joke_type_twopart)
         
+        # Group the radios so the checked one can be read in a single call
+        self._joke_type_group = QButtonGroup(self)
+        self._joke_type_codes = {
+            self.joke_type_any: "Any",
+            self.joke_type_single: "single",
+            self.joke_type_twopart: "twopart"
+        }
+        for radio in self._joke_type_codes:
+            self._joke_type_group.addButton(radio)
+        
         settings_layout.addWidget(type_group)
         
         # ========== Language settings ==========
         language_group = QGroupBox("Language")
         language_layout = QVBoxLayout(language_group)
         
-        # Available languages
-        languages = [
-            ("English", "en"),
-            ("German", "de"),
-            ("Spanish", "es"),
-            ("French", "fr"),
-            ("Italian", "it")
-        ]
-        
         # Create language radio buttons
-        self.language_buttons = {}
-        for lang_name, lang_code in languages:
+        self._lang_group = QButtonGroup(self)
+        self._lang_codes = {}
+        for lang_name, lang_code in self._LANGUAGES:
             radio = QRadioButton(lang_name)
             radio.setChecked(current_settings["language"] == lang_code)
-            self.language_buttons[lang_code] = radio
+            self._lang_group.addButton(radio)
+            self._lang_codes[radio] = lang_code
             language_layout.addWidget(radio)
         
         settings_layout.addWidget(language_group)
@@ -836,8 +1125,8 @@ class SettingsDialog(QDialog):
         
         # Save button
         save_button = QPushButton("Save Settings")
+        save_button.setObjectName("saveButton")
         save_button.clicked.connect(self.accept)
-        save_button.setStyleSheet("font-weight: bold;")
         buttons_layout.addWidget(save_button)
         
         main_layout.addLayout(buttons_layout)
@@ -847,57 +1136,192 @@ class SettingsDialog(QDialog):
     
     def set_quick_time(self, minutes):
         self.frequency_slider.setValue(minutes)
-        self.update_frequency_display(minutes)
     
     def update_category_mode(self):
         enabled = not self.category_mode_any.isChecked()
-        
-        for checkbox in self.category_checkboxes.values():
-            checkbox.setEnabled(enabled)
+        self._cat_container.setEnabled(enabled)
     
     def get_settings(self):
-        # Build settings dictionary from UI state
-        settings = dict(self.current_settings)  # Start with a copy of current settings
-        
-        # Frequency
-        settings["frequency"] = self.frequency_slider.value()
-        
         # Categories
         if self.category_mode_any.isChecked():
-            settings["categories"] = ["Any"]
+            categories = ["Any"]
         else:
-            selected_categories = [cat for cat, cb in self.category_checkboxes.items() if cb.isChecked()]
+            categories = [cat for cat, cb in self._cat_items if cb.isChecked()]
             
             # Ensure at least one category is selected
-            if not selected_categories:
-                selected_categories = ["Misc"]  # Default to Misc if nothing selected
-            
-            settings["categories"] = selected_categories
+            if not categories:
+                categories = ["Misc"]  # Default to Misc if nothing selected
         
-        # Safe mode
-        settings["safe_mode"] = self.safe_mode_cb.isChecked()
-        
-        # Joke type
-        if self.joke_type_any.isChecked():
-            settings["joke_type"] = "Any"
-        elif self.joke_type_single.isChecked():
-            settings["joke_type"] = "single"
-        else:
-            settings["joke_type"] = "twopart"
-        
-        # Language
-        for lang_code, radio in self.language_buttons.items():
-            if radio.isChecked():
-                settings["language"] = lang_code
-                break
+        # Build settings dictionary from UI state
+        settings = {
+            "frequency": self.frequency_slider.value(),
+            "categories": categories,
+            "safe_mode": self.safe_mode_cb.isChecked(),
+            "joke_type": self._joke_type_codes.get(self._joke_type_group.checkedButton(), "twopart"),
+            # Keep the current language if no button is checked
+            "language": self._lang_codes.get(self._lang_group.checkedButton(), self.current_settings["language"]),
+            "autostart": self.autostart_cb.isChecked()
+        }
         
-        # Advanced options
-        settings["autostart"] = self.autostart_cb.isChecked()
+        # Carry over settings this dialog does not edit (notification_duration, max_history)
+        for key, value in self.current_settings.items():
+            settings.setdefault(key, value)
         
         return settings
 
 
-def apply_dark_theme(app):
+def _minify_qss(qss):
+    """Strip comments and whitespace so Qt's stylesheet parser has less to scan."""
+    qss = re.sub(r"/\*.*?\*/", "", qss, flags=re.S)
+    qss = re.sub(r"\s+", " ", qss)
+    qss = re.sub(r"\s*([{}:;,])\s*", r"\1", qss)
+    return qss.strip()
+
+
+# Theme stylesheets, minified once at import and shared by every theme apply
+_DARK_QSS = _minify_qss("""
+    QGroupBox {
+        font-weight: bold;
+        border: 1px solid #555;
+        border-radius: 5px;
+        margin-top: 10px;
+        padding-top: 10px;
+    }
+    
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 5px;
+    }
+    
+    QPushButton {
+        padding: 6px 12px;
+        border-radius: 3px;
+        background-color: #444;
+        border: 1px solid #555;
+    }
+    
+    QPushButton:hover {
+        background-color: #555;
+    }
+    
+    QPushButton:pressed {
+        background-color: #333;
+    }
+    
+    QPushButton#saveButton {
+        font-weight: bold;
+    }
+    
+    QListWidget {
+        background-color: #333;
+        alternate-background-color: #3a3a3a;
+        border: 1px solid #555;
+    }
+    
+    QSlider#freqSlider::groove:horizontal {
+        height: 8px;
+        background: #444;
+        border-radius: 4px;
+    }
+    
+    QSlider#freqSlider::handle:horizontal {
+        background: #2a82da;
+        border: 1px solid #2a82da;
+        width: 18px;
+        margin: -6px 0;
+        border-radius: 9px;
+    }
+    
+    QSlider#freqSlider::add-page:horizontal {
+        background: #444;
+        border-radius: 4px;
+    }
+    
+    QSlider#freqSlider::sub-page:horizontal {
+        background: #2a82da;
+        border-radius: 4px;
+    }
+    
+    QScrollArea {
+        background-color: #333;
+        border: none;
+    }
+    
+    QTextEdit {
+        background-color: #333;
+        border: 1px solid #555;
+    }
+""")
+
+_LIGHT_QSS = _minify_qss("""
+    QGroupBox {
+        font-weight: bold;
+        border: 1px solid #ccc;
+        border-radius: 5px;
+        margin-top: 10px;
+        padding-top: 10px;
+    }
+    
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 5px;
+    }
+    
+    QPushButton {
+        padding: 6px 12px;
+        border-radius: 3px;
+        background-color: #f0f0f0;
+    }
+    
+    QPushButton:hover {
+        background-color: #e0e0e0;
+    }
+    
+    QPushButton:pressed {
+        background-color: #d0d0d0;
+    }
+    
+    QPushButton#saveButton {
+        font-weight: bold;
+    }
+    
+    QSlider#freqSlider::groove:horizontal {
+        height: 8px;
+        background: #ddd;
+        border-radius: 4px;
+    }
+    
+    QSlider#freqSlider::handle:horizontal {
+        background: #5c9eff;
+        border: 1px solid #5c9eff;
+        width: 18px;
+        margin: -6px 0;
+        border-radius: 9px;
+    }
+    
+    QSlider#freqSlider::add-page:horizontal {
+        background: #ddd;
+        border-radius: 4px;
+    }
+    
+    QSlider#freqSlider::sub-page:horizontal {
+        background: #9fc7ff;
+        border-radius: 4px;
+    }
+""")
+
+
+@functools.lru_cache(maxsize=1)
+def _ui_font():
+    """Return the shared application font (built on first use, after QApplication exists)."""
+    return QFont("Arial", 10)
+
+
+@functools.lru_cache(maxsize=1)
+def _build_dark_palette():
+    """Build the dark theme palette once; later applies reuse the same object."""
     # Dark color palette
     dark_palette = QPalette()
     dark_palette.setColor(QPalette.ColorRole.Window, QColor(53, 53, 53))
@@ -913,179 +1337,50 @@ def apply_dark_theme(app):
     dark_palette.setColor(QPalette.ColorRole.Highlight, QColor(42, 130, 218))
     dark_palette.setColor(QPalette.ColorRole.HighlightedText, Qt.GlobalColor.black)
     
+    return dark_palette
+
+
+def apply_dark_theme(app):
     # Apply the palette
-    app.setPalette(dark_palette)
-    
-    # Set stylesheet for additional customizations
-    app.setStyleSheet("""
-        QGroupBox {
-            font-weight: bold;
-            border: 1px solid #555;
-            border-radius: 5px;
-            margin-top: 10px;
-            padding-top: 10px;
-        }
-        
-        QGroupBox::title {
-            subcontrol-origin: margin;
-            left: 10px;
-            padding: 0 5px;
-        }
-        
-        QPushButton {
-            padding: 6px 12px;
-            border-radius: 3px;
-            background-color: #444;
-            color: white;
-            border: 1px solid #555;
-        }
-        
-        QPushButton:hover {
-            background-color: #555;
-        }
-        
-        QPushButton:pressed {
-            background-color: #333;
-        }
-        
-        QLabel {
-            color: white;
-        }
-        
-        QListWidget {
-            background-color: #333;
-            color: white;
-            alternate-background-color: #3a3a3a;
-            border: 1px solid #555;
-        }
-        
-        QSlider::groove:horizontal {
-            height: 8px;
-            background: #444;
-            border-radius: 4px;
-        }
-        
-        QSlider::handle:horizontal {
-            background: #2a82da;
-            border: 1px solid #2a82da;
-            width: 18px;
-            margin: -6px 0;
-            border-radius: 9px;
-        }
-        
-        QSlider::add-page:horizontal {
-            background: #444;
-            border-radius: 4px;
-        }
-        
-        QSlider::sub-page:horizontal {
-            background: #2a82da;
-            border-radius: 4px;
-        }
-        
-        QCheckBox {
-            color: white;
-        }
-        
-        QRadioButton {
-            color: white;
-        }
-        
-        QScrollArea {
-            background-color: #333;
-            border: none;
-        }
-        
-        QTextEdit {
-            background-color: #333;
-            color: white;
-            border: 1px solid #555;
-        }
-    """)
+    app.setPalette(_build_dark_palette())
+    
+    # Set stylesheet for additional customizations; text colors come from the palette
+    app.setStyleSheet(_DARK_QSS)
 
 
 def apply_light_theme(app):
     # Set application-wide font
-    app.setFont(QFont("Arial", 10))
+    app.setFont(_ui_font())
     
     # Apply stylesheet for better appearance
-    app.setStyleSheet("""
-        QGroupBox {
-            font-weight: bold;
-            border: 1px solid #ccc;
-            border-radius: 5px;
-            margin-top: 10px;
-            padding-top: 10px;
-        }
-        
-        QGroupBox::title {
-            subcontrol-origin: margin;
-            left: 10px;
-            padding: 0 5px;
-        }
-        
-        QPushButton {
-            padding: 6px 12px;
-            border-radius: 3px;
-            background-color: #f0f0f0;
-        }
-        
-        QPushButton:hover {
-            background-color: #e0e0e0;
-        }
-        
-        QPushButton:pressed {
-            background-color: #d0d0d0;
-        }
-        
-        QSlider::groove:horizontal {
-            height: 8px;
-            background: #ddd;
-            border-radius: 4px;
-        }
-        
-        QSlider::handle:horizontal {
-            background: #5c9eff;
-            border: 1px solid #5c9eff;
-            width: 18px;
-            margin: -6px 0;
-            border-radius: 9px;
-        }
-        
-        QSlider::add-page:horizontal {
-            background: #ddd;
-            border-radius: 4px;
-        }
-        
-        QSlider::sub-page:horizontal {
-            background: #9fc7ff;
-            border-radius: 4px;
-        }
-    """)
+    app.setStyleSheet(_LIGHT_QSS)
 
 
-def main():
-    app = QApplication(sys.argv)
-    app.setStyle('Fusion')  # Use Fusion style for a modern look
-    
-    # Detect system theme (you might need to customize this for your needs)
+@functools.lru_cache(maxsize=1)
+def _is_windows_dark():
+    """Return True if Windows apps are set to use the dark theme."""
     # This is a basic approach - a more sophisticated detection might be needed
-    is_dark_theme = False
+    if sys.platform != 'win32':
+        return False
     
-    # Check if Windows is using dark theme
-    if sys.platform == 'win32':
+    try:
+        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Software\Microsoft\Windows\CurrentVersion\Themes\Personalize')
         try:
-            import winreg
-            registry = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
-            key = winreg.OpenKey(registry, r'Software\Microsoft\Windows\CurrentVersion\Themes\Personalize')
             value, _ = winreg.QueryValueEx(key, 'AppsUseLightTheme')
-            is_dark_theme = value == 0
-        except:
-            # If we can't determine, assume light theme
-            pass
+        finally:
+            winreg.CloseKey(key)
+        return value == 0
+    except OSError:
+        # If we can't determine, assume light theme
+        return False
+
+
+def main():
+    app = QApplication(sys.argv)
+    app.setStyle('Fusion')  # Use Fusion style for a modern look
     
     # Apply appropriate theme
-    if is_dark_theme:
+    if _is_windows_dark():
         apply_dark_theme(app)
     else:
         apply_light_theme(app)